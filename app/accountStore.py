@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import sqlite3
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Dict
+
+from .schemas import TransactionType
+from .transactionLog import TransactionLog
+
+# Thread-safety invariants:
+# - Per-account state is only mutated while holding AccountState.lock, on every build.
+# - LRUAccountStore always holds its own lock; its OrderedDict + sqlite moves span
+#   several steps that no interpreter makes atomic.
+# - Reads of an account's transaction columns take AccountState.lock too, since a
+#   transaction is appended to several arrays one after the other.
+# - AccountStore.setdefault relies on dict.setdefault being atomic when creating an
+#   account. It is on both builds: under the GIL, and on free-threaded builds
+#   (python3.13t) under the dict's own per-object lock. Nothing else relies on the GIL.
+
+
+@dataclass
+class AccountState:
+    """Per-account ledger state, kept together so a transaction needs a single lookup."""
+
+    id_prefix: str  # f"{hash(account_id)}_", built once per account
+    balance: int = 0
+    transactions: TransactionLog = field(default_factory=TransactionLog)
+    # Guards the validate + record sequence so concurrent requests can't lose updates
+    # or overdraw the account.
+    lock: Lock = field(default_factory=Lock)
+    # Set (under lock) once the state has been moved to the cold store; holders of a
+    # stale reference must look the account up again before writing to it.
+    evicted: bool = False
+    # Number of leading transactions already written to the cold store, so a spill
+    # only writes the ones appended since the account was last loaded.
+    cold_length: int = 0
+
+
+class AccountStore:
+    """Account states keyed by account id, all kept in memory."""
+
+    def __init__(self) -> None:
+        self._accounts: Dict[str, AccountState] = {}
+
+    def get(self, account_id: str) -> AccountState | None:
+        return self._accounts.get(account_id)
+
+    def setdefault(self, account_id: str, state: AccountState) -> AccountState:
+        return self._accounts.setdefault(account_id, state)
+
+
+class LRUAccountStore(AccountStore):
+    """Account store that keeps only the most recently used accounts in memory.
+
+    Least recently used accounts are written to a sqlite database and loaded back on
+    their next access. While an account is in memory that state is authoritative; its
+    sqlite rows are kept when it is loaded, so the next spill only updates the balance
+    and adds the transactions appended since. An account is only dropped from memory
+    once its write to sqlite has committed.
+
+    The default cold_store_path "" is a private temporary file that sqlite deletes on
+    close, so spilled accounts leave process memory (":memory:" would keep them there
+    as sqlite pages). The cold store is spill space for this process, not persistence:
+    its tables are cleared on startup, since accounts that were hot when a previous
+    process stopped were never written to it.
+    """
+
+    def __init__(self, max_hot_accounts: int, cold_store_path: str = "") -> None:
+        if max_hot_accounts < 1:
+            raise ValueError(f"max_hot_accounts must be positive: {max_hot_accounts}")
+        self._max_hot_accounts = max_hot_accounts
+        self._hot: OrderedDict[str, AccountState] = OrderedDict()
+        self._cold = sqlite3.connect(cold_store_path, check_same_thread=False)
+        # LRU bookkeeping and moves to/from the cold store span several steps.
+        self._lock = Lock()
+        self._reset_cold_tables()
+
+    def get(self, account_id: str) -> AccountState | None:
+        with self._lock:
+            return self._get_and_promote(account_id)
+
+    def setdefault(self, account_id: str, state: AccountState) -> AccountState:
+        with self._lock:
+            existing = self._get_and_promote(account_id)
+            if existing is not None:
+                return existing
+            self._make_room()
+            self._hot[account_id] = state
+            return state
+
+    def _get_and_promote(self, account_id: str) -> AccountState | None:
+        state = self._hot.get(account_id)
+        if state is not None:
+            self._hot.move_to_end(account_id)
+            return state
+        state = self._load_cold(account_id)
+        if state is not None:
+            self._make_room()
+            self._hot[account_id] = state
+        return state
+
+    def _make_room(self) -> None:
+        # Runs before an account is added, so a failed spill leaves both tiers as
+        # they were and the request that triggered it fails without side effects.
+        while len(self._hot) >= self._max_hot_accounts:
+            account_id, state = next(iter(self._hot.items()))
+            # Waits for any in-flight transaction on the account to finish recording.
+            with state.lock:
+                self._save_cold(account_id, state)
+                # Only leaves the hot tier once the write has committed.
+                del self._hot[account_id]
+                state.evicted = True
+
+    def _reset_cold_tables(self) -> None:
+        with self._cold:
+            self._cold.execute(
+                """CREATE TABLE IF NOT EXISTS accounts (
+                    account_id TEXT PRIMARY KEY,
+                    id_prefix TEXT NOT NULL,
+                    balance INTEGER NOT NULL
+                )"""
+            )
+            self._cold.execute(
+                """CREATE TABLE IF NOT EXISTS transactions (
+                    account_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    type TEXT NOT NULL,
+                    amount INTEGER NOT NULL,
+                    description TEXT,
+                    timestamp REAL NOT NULL,
+                    PRIMARY KEY (account_id, position)
+                )"""
+            )
+            self._cold.execute("DELETE FROM accounts")
+            self._cold.execute("DELETE FROM transactions")
+
+    def _save_cold(self, account_id: str, state: AccountState) -> None:
+        with self._cold:
+            self._cold.execute(
+                "INSERT OR REPLACE INTO accounts VALUES (?, ?, ?)",
+                (account_id, state.id_prefix, state.balance),
+            )
+            self._cold.executemany(
+                "INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (account_id, position, type.value, amount, description, timestamp)
+                    for position, (type, amount, timestamp, description) in enumerate(
+                        state.transactions.records(state.cold_length),
+                        state.cold_length,
+                    )
+                ],
+            )
+
+    def _load_cold(self, account_id: str) -> AccountState | None:
+        row = self._cold.execute(
+            "SELECT id_prefix, balance FROM accounts WHERE account_id = ?",
+            (account_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        log = TransactionLog()
+        for type, amount, description, timestamp in self._cold.execute(
+            "SELECT type, amount, description, timestamp FROM transactions "
+            "WHERE account_id = ? ORDER BY position",
+            (account_id,),
+        ):
+            log.append(TransactionType(type), amount, timestamp, description)
+        return AccountState(
+            id_prefix=row[0], balance=row[1], transactions=log, cold_length=len(log)
+        )
@@ -1,82 +1,279 @@
 from __future__ import annotations
-from typing import List
+import email.message
+import os
+from typing import Annotated, Any, Callable, Dict, List, TypeVar
 
-from fastapi import FastAPI, HTTPException, APIRouter, status
-from pydantic import BaseModel
+from fastapi import Depends, FastAPI, HTTPException, APIRouter, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 
-from .schemas import Transaction, TransactionType
-from .tinyLedger import InsufficientFundsError, LedgerService
+from .schemas import MAX_AMOUNT, StoredTransaction, Transaction, TransactionType
+from .tinyLedger import (
+    BalanceLimitExceededError,
+    InsufficientFundsError,
+    LedgerService,
+)
 
 
 class TransactionRequest(BaseModel):
-    amount: float
+    # Minor currency units, e.g. cents. Strict so that floats (the old format, in
+    # major units) and numeric strings are rejected instead of read as cents.
+    amount: int = Field(gt=0, le=MAX_AMOUNT, strict=True)
     type: TransactionType  # "deposit" | "withdrawal"
     description: str | None = None
 
 
+# A batch is recorded under its account's lock, so its size bounds how long other
+# requests for the account can be kept waiting.
+MAX_BATCH_SIZE = 1000
+
+
 class TransactionResponse(BaseModel):
     message: str
 
 
 class BalanceResponse(BaseModel):
-    balance: float
+    balance: int
+
+
+# Built once so the pydantic-core validator/serializer isn't recompiled per request.
+_TRANSACTION_LIST_ADAPTER = TypeAdapter(List[StoredTransaction])
+_TRANSACTION_REQUEST_LIST_ADAPTER = TypeAdapter(
+    Annotated[List[TransactionRequest], Field(min_length=1, max_length=MAX_BATCH_SIZE)]
+)
+
+# The bodies are parsed by dependencies, so FastAPI can't document them on its own.
+# The request schema and everything it references are registered as components.
+_TRANSACTION_REQUEST_SCHEMA = TransactionRequest.model_json_schema(
+    ref_template="#/components/schemas/{model}"
+)
+_REQUEST_BODY_COMPONENTS: Dict[str, Any] = {
+    **_TRANSACTION_REQUEST_SCHEMA.pop("$defs", {}),
+    "TransactionRequest": _TRANSACTION_REQUEST_SCHEMA,
+}
+_TRANSACTION_REQUEST_REF = {"$ref": "#/components/schemas/TransactionRequest"}
+
+
+async def _transaction_request_from_body(request: Request) -> TransactionRequest:
+    """Validate the raw request body in a single pass.
+
+    model_validate_json parses and validates the bytes directly in pydantic-core,
+    skipping the intermediate dict that json.loads + validation would build.
+    """
+    body = await request.body()
+    try:
+        if _has_json_content_type(request):
+            return TransactionRequest.model_validate_json(body)
+        # Rejected the same way FastAPI rejects a non-JSON body for a model
+        return TransactionRequest.model_validate(body)
+    except ValidationError as err:
+        raise _body_validation_error(err)
+
+
+async def _transaction_requests_from_body(request: Request) -> List[TransactionRequest]:
+    """Validate a raw JSON list of transaction requests in a single pass."""
+    body = await request.body()
+    try:
+        if _has_json_content_type(request):
+            return _TRANSACTION_REQUEST_LIST_ADAPTER.validate_json(body)
+        return _TRANSACTION_REQUEST_LIST_ADAPTER.validate_python(body)
+    except ValidationError as err:
+        raise _body_validation_error(err)
+
+
+def _has_json_content_type(request: Request) -> bool:
+    # Same rule as FastAPI's body handling: no content type, or application/json or
+    # application/*+json.
+    content_type = request.headers.get("content-type")
+    if not content_type:
+        return True
+    message = email.message.Message()
+    message["content-type"] = content_type
+    if message.get_content_maintype() != "application":
+        return False
+    subtype = message.get_content_subtype()
+    return subtype == "json" or subtype.endswith("+json")
+
+
+def _body_validation_error(err: ValidationError) -> RequestValidationError:
+    # Same shape FastAPI produces for body models: locations are prefixed with "body".
+    return RequestValidationError(
+        [{**error, "loc": ("body", *error["loc"])} for error in err.errors()]
+    )
+
+
+_T = TypeVar("_T")
 
 
 class LedgerHandler:
     """Public facing API handler to provide access to ledger operations.
-    Provides endpoints to create transactions, view balance, and list transactions.
+    Provides endpoints to create transactions (singly or in batches), view balance,
+    and list transactions.
+
+    Configured from the environment:
+        TINY_LEDGER_MAX_HOT_ACCOUNTS: keep only this many recently used accounts in
+                memory and spill the rest to a sqlite cold store (default: unbounded).
+        TINY_LEDGER_COLD_STORE_PATH: sqlite database used as the cold store
+                (default: a private temporary file). It is cleared on startup.
     """
 
     def __init__(self):
-        self.ledgerService = LedgerService()
+        max_hot_accounts = os.environ.get("TINY_LEDGER_MAX_HOT_ACCOUNTS")
+        self.ledgerService = LedgerService(
+            max_hot_accounts=int(max_hot_accounts) if max_hot_accounts else None,
+            cold_store_path=os.environ.get("TINY_LEDGER_COLD_STORE_PATH", ""),
+        )
+        # Without a cold store the service only does in-memory work and never blocks,
+        # so it runs directly on the event loop. With one, any call may do sqlite I/O,
+        # so calls are moved to the threadpool instead.
+        self._offload_service_calls = bool(max_hot_accounts)
         self.router = APIRouter()
 
+        # Routes are async so the in-memory case avoids the threadpool dispatch of
+        # sync routes; see _call_service for the cold store case.
         @self.router.post(
             "/transactions/{account_id}",
             response_model=TransactionResponse,
             status_code=status.HTTP_201_CREATED,
+            openapi_extra={
+                "requestBody": {
+                    "required": True,
+                    "content": {
+                        "application/json": {"schema": _TRANSACTION_REQUEST_REF}
+                    },
+                }
+            },
         )
-        def create_transaction(
-            account_id: str, request: TransactionRequest
+        async def create_transaction(
+            account_id: str,
+            request: TransactionRequest = Depends(_transaction_request_from_body),
         ) -> TransactionResponse:
             """Create a deposit or withdrawal transaction."""
             try:
-                self.ledgerService.process_transaction(
-                    account_id, request.type, request.amount, request.description
+                await self._call_service(
+                    self.ledgerService.process_transaction,
+                    account_id,
+                    request.type,
+                    request.amount,
+                    request.description,
                 )
                 return TransactionResponse(message="Transaction successfully recorded.")
             except ValueError as err:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND, detail=str(err)
                 )
-            except InsufficientFundsError as err:
+            except (InsufficientFundsError, BalanceLimitExceededError) as err:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)
                 )
 
+        @self.router.post(
+            "/transactions/{account_id}/batch",
+            response_model=TransactionResponse,
+            status_code=status.HTTP_201_CREATED,
+            openapi_extra={
+                "requestBody": {
+                    "required": True,
+                    "content": {
+                        "application/json": {
+                            "schema": {
+                                "type": "array",
+                                "items": _TRANSACTION_REQUEST_REF,
+                                "minItems": 1,
+                                "maxItems": MAX_BATCH_SIZE,
+                            }
+                        }
+                    },
+                }
+            },
+        )
+        async def create_transactions_batch(
+            account_id: str,
+            requests: List[TransactionRequest] = Depends(
+                _transaction_requests_from_body
+            ),
+        ) -> TransactionResponse:
+            """Create several transactions in order; all are recorded or none are."""
+            try:
+                await self._call_service(
+                    self.ledgerService.process_transactions,
+                    account_id,
+                    [
+                        (request.type, request.amount, request.description)
+                        for request in requests
+                    ],
+                )
+                count = len(requests)
+                return TransactionResponse(
+                    message=f"{count} transaction{'' if count == 1 else 's'} "
+                    "successfully recorded."
+                )
+            except ValueError as err:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND, detail=str(err)
+                )
+            except (InsufficientFundsError, BalanceLimitExceededError) as err:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)
+                )
+
+        # The GET routes return a Response directly so FastAPI skips re-validating
+        # data the service produced itself; response_model is kept for the docs.
         @self.router.get("/balance/{account_id}", response_model=BalanceResponse)
-        def get_balance(account_id: str) -> BalanceResponse:
+        async def get_balance(account_id: str) -> ORJSONResponse:
             """Return the current account balance."""
             try:
-                balance = self.ledgerService.get_balance(account_id)
-                return BalanceResponse(balance=balance)
+                balance = await self._call_service(
+                    self.ledgerService.get_balance, account_id
+                )
+                return ORJSONResponse(content={"balance": balance})
             except ValueError as err:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND, detail=str(err)
                 )
 
         @self.router.get("/transactions/{account_id}", response_model=List[Transaction])
-        def list_transactions(account_id: str) -> List[Transaction]:
+        async def list_transactions(account_id: str) -> ORJSONResponse:
             """Return the transaction history."""
             try:
-                return self.ledgerService.list_transactions(account_id)
+                transactions = await self._call_service(
+                    self.ledgerService.list_transactions, account_id
+                )
+                return ORJSONResponse(
+                    content=_TRANSACTION_LIST_ADAPTER.dump_python(
+                        transactions, mode="json"
+                    )
+                )
             except ValueError as err:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND, detail=str(err)
                 )
 
+    async def _call_service(self, method: Callable[..., _T], *args: Any) -> _T:
+        if self._offload_service_calls:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+
 
 # Instantiate handler and mount its router onto the app.
-app = FastAPI(title="Tiny Ledger API")
+app = FastAPI(title="Tiny Ledger API", default_response_class=ORJSONResponse)
 handler = LedgerHandler()
 app.include_router(handler.router)
+
+
+def _openapi() -> Dict[str, Any]:
+    """Default OpenAPI schema plus the components of the dependency-parsed bodies."""
+    if app.openapi_schema is not None:
+        return app.openapi_schema
+    # Builds and caches the schema on app.openapi_schema; the cached dict is updated.
+    schema = FastAPI.openapi(app)
+    schema.setdefault("components", {}).setdefault("schemas", {}).update(
+        _REQUEST_BODY_COMPONENTS
+    )
+    return schema
+
+
+# FastAPI's documented way to customise the schema is to replace this method.
+app.openapi = _openapi  # type: ignore[method-assign]
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 from typing import Optional
 
 from pydantic import BaseModel
 
+# Largest amount or balance the ledger accepts: the int64 limit, since amounts are
+# stored in array("q") columns and in sqlite INTEGER columns by the cold store.
+MAX_AMOUNT = 2**63 - 1
+
 
 class TransactionType(str, Enum):
     """Allowed transaction types."""
@@ -15,11 +20,27 @@ class TransactionType(str, Enum):
 
 
 class Transaction(BaseModel):
-    """Representation of a stored transaction."""
+    """API representation of a stored transaction."""
+
+    id: str
+    account_id: str
+    type: TransactionType
+    amount: int  # minor currency units, e.g. cents
+    description: Optional[str]
+    timestamp: datetime
+
+
+@dataclass(slots=True, frozen=True)
+class StoredTransaction:
+    """Transaction record as read back from the ledger.
+
+    Same fields as Transaction, but a slotted dataclass is much cheaper to build than
+    a pydantic model and has no validation overhead.
+    """
 
     id: str
     account_id: str
     type: TransactionType
-    amount: float
+    amount: int  # minor currency units, e.g. cents
     description: Optional[str]
     timestamp: datetime
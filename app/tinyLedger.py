@@ -1,10 +1,17 @@
 from __future__ import annotations
 
-from datetime import datetime
 from time import time
-from typing import Dict, List
+from typing import Dict, List, Sequence, Tuple
 
-from .schemas import *
+from .accountStore import AccountState, AccountStore, LRUAccountStore
+from .schemas import MAX_AMOUNT, StoredTransaction, TransactionType
+
+
+# Balance multiplier per transaction type, applied when recording a transaction.
+_SIGN: Dict[TransactionType, int] = {
+    TransactionType.DEPOSIT: 1,
+    TransactionType.WITHDRAWAL: -1,
+}
 
 
 class InsufficientFundsError(Exception):
@@ -13,6 +20,12 @@ class InsufficientFundsError(Exception):
     pass
 
 
+class BalanceLimitExceededError(Exception):
+    """Exception raised when a deposit would take the balance above MAX_AMOUNT."""
+
+    pass
+
+
 class LedgerService:
     """In-memory ledger service for managing account transactions and balances.
 
@@ -21,95 +34,190 @@ class LedgerService:
         process_transaction: Process deposit or withdrawal.
                 Accounts are auto-created on first transaction.
                 Withdrawals require the account to already exist and sufficient funds in it.
+        process_transactions: Process a batch of transactions for one account, in order.
+                Either every transaction is recorded or, if any is rejected, none are.
         get_balance: Get current account balance (raises ValueError if not found).
         list_transactions: Get transaction history (raises ValueError if not found).
+
+    Amounts and balances are integers in minor currency units (e.g. cents). Each
+    account's history is stored column by column (see TransactionLog) and only turned
+    into StoredTransaction rows by list_transactions.
+
+    By default all accounts are kept in memory. Pass max_hot_accounts to keep only the
+    most recently used ones in memory and spill the rest to a sqlite cold store at
+    cold_store_path, a private temporary file by default (see LRUAccountStore).
     """
 
-    def __init__(self) -> None:
-        self._transactions: Dict[str, List[Transaction]] = {}
-        self._balances: Dict[str, float] = {}
+    def __init__(
+        self, max_hot_accounts: int | None = None, cold_store_path: str = ""
+    ) -> None:
+        self._accounts: AccountStore = (
+            AccountStore()
+            if max_hot_accounts is None
+            else LRUAccountStore(max_hot_accounts, cold_store_path)
+        )
 
     def process_transaction(
         self,
         account_id: str,
         transaction_type: TransactionType,
-        amount: float,
+        amount: int,
         description: str | None = None,
     ) -> None:
-        # Parsing
-        current_timestamp = datetime.fromtimestamp(time())
-        transaction = self._parse_transaction_request(
-            account_id, transaction_type, amount, current_timestamp, description
-        )
+        # Plain strings are converted so the identity checks below hold for them too;
+        # the exact type check keeps the enum (handler) path free of the conversion.
+        if type(transaction_type) is not TransactionType:
+            transaction_type = TransactionType(transaction_type)
 
         # Validation
-        self._validate_transaction_amount(transaction.amount)
-        if transaction.type == TransactionType.WITHDRAWAL:
-            self._validate_withdrawal_is_possible(transaction)
-
-        # Record transaction
-        self._setup_account_if_not_exists(transaction.account_id)
-        self._record_transaction(transaction)
+        self._validate_transaction_amount(amount)
+        while True:
+            state = self._accounts.get(account_id)
+            if state is None:
+                if transaction_type is TransactionType.WITHDRAWAL:
+                    raise ValueError(f"Account {account_id} does not exist.")
+                state = self._create_account(account_id)
+
+            with state.lock:
+                # If it was moved to the cold store since the lookup, fetch it again.
+                if not state.evicted:
+                    if transaction_type is TransactionType.WITHDRAWAL:
+                        self._validate_withdrawal_is_possible(
+                            account_id, state.balance, amount
+                        )
+                    else:
+                        self._validate_deposit_is_possible(
+                            account_id, state.balance, amount
+                        )
+
+                    # Record transaction
+                    self._record_transaction(
+                        state, transaction_type, amount, time(), description
+                    )
+                    return
+
+    def process_transactions(
+        self,
+        account_id: str,
+        transactions: Sequence[Tuple[TransactionType, int, str | None]],
+    ) -> None:
+        """Process (type, amount, description) transactions under a single lock."""
+        if not transactions:
+            return
+
+        # As in process_transaction, only rebuilt if a type isn't already the enum
+        if any(
+            type(transaction_type) is not TransactionType
+            for transaction_type, _, _ in transactions
+        ):
+            transactions = [
+                (TransactionType(transaction_type), amount, description)
+                for transaction_type, amount, description in transactions
+            ]
 
-    def get_balance(self, account_id: str) -> float:
-        if account_id not in self._balances:
+        # Validation
+        for _, amount, _ in transactions:
+            self._validate_transaction_amount(amount)
+        while True:
+            state = self._accounts.get(account_id)
+            if state is None:
+                # Reject before creating the account, so a failed batch leaves no trace
+                self._validate_batch(account_id, None, transactions)
+                state = self._create_account(account_id)
+
+            with state.lock:
+                # If it was moved to the cold store since the lookup, fetch it again.
+                if not state.evicted:
+                    self._validate_batch(account_id, state.balance, transactions)
+
+                    # Record transactions
+                    current_timestamp = time()
+                    for transaction_type, amount, description in transactions:
+                        self._record_transaction(
+                            state,
+                            transaction_type,
+                            amount,
+                            current_timestamp,
+                            description,
+                        )
+                    return
+
+    def get_balance(self, account_id: str) -> int:
+        return self._get_existing_account(account_id).balance
+
+    def list_transactions(self, account_id: str) -> List[StoredTransaction]:
+        state = self._get_existing_account(account_id)
+        # Snapshot the columns under the lock (a cheap memcpy per column) so a
+        # concurrent append can't leave them uneven, then build rows outside it.
+        with state.lock:
+            transactions = state.transactions.copy()
+        return transactions.rows(account_id, state.id_prefix)
+
+    def _get_existing_account(self, account_id: str) -> AccountState:
+        state = self._accounts.get(account_id)
+        if state is None:
             raise ValueError(f"Account {account_id} does not exist.")
-        return self._balances[account_id]
+        return state
 
-    def list_transactions(self, account_id: str) -> List[Transaction]:
-        if account_id not in self._transactions:
-            raise ValueError(f"Account {account_id} does not exist.")
-        return self._transactions[account_id]
+    def _create_account(self, account_id: str) -> AccountState:
+        # setdefault so two requests racing to create the account share one state
+        return self._accounts.setdefault(
+            account_id, AccountState(id_prefix=f"{hash(account_id)}_")
+        )
 
-    def _parse_transaction_request(
+    def _record_transaction(
         self,
-        account_id: str,
+        state: AccountState,
         transaction_type: TransactionType,
-        amount: float,
-        transaction_timestamp: datetime,
-        description: str | None = None,
-    ) -> Transaction:
-        return Transaction(
-            id=self._generate_transaction_id(account_id),
-            account_id=account_id,
-            type=transaction_type,
-            amount=amount,
-            description=description,
-            timestamp=transaction_timestamp,
-        )
-
-    def _generate_transaction_id(self, account_id: str) -> str:
-        transaction_number = len(self._transactions.get(account_id, [])) + 1
-        return f"{hash(account_id)}_{transaction_number}"
-
-    def _setup_account_if_not_exists(self, account_id: str) -> None:
-        if not account_id in self._transactions:
-            self._transactions[account_id] = []
-        # In practice if one doesn't exist, the other also won't, but this is more sturdy
-        if not account_id in self._balances:
-            self._balances[account_id] = 0.0
-
-    def _record_transaction(self, transaction: Transaction) -> None:
-        self._transactions[transaction.account_id].append(transaction)
-
-        if transaction.type == TransactionType.DEPOSIT:
-            self._balances[transaction.account_id] += transaction.amount
-        elif transaction.type == TransactionType.WITHDRAWAL:
-            self._balances[transaction.account_id] -= transaction.amount
-        else:
-            raise ValueError(f"Unknown transaction type: {transaction.type}")
+        amount: int,
+        timestamp: float,
+        description: str | None,
+    ) -> None:
+        # Callers have already normalised the type and validated the amount and the
+        # resulting balance. Append first: if it raises, the balance must not move.
+        state.transactions.append(transaction_type, amount, timestamp, description)
+        state.balance += _SIGN[transaction_type] * amount
 
-    def _validate_transaction_amount(self, amount: float) -> None:
+    def _validate_transaction_amount(self, amount: int) -> None:
         if amount <= 0:
             raise ValueError(f"Transaction amount must be positive: {amount}")
+        if amount > MAX_AMOUNT:
+            raise ValueError(
+                f"Transaction amount must not exceed {MAX_AMOUNT}: {amount}"
+            )
 
-    def _validate_withdrawal_is_possible(self, transaction: Transaction) -> None:
-        if not transaction.account_id in self._balances:
-            raise ValueError(f"Account {transaction.account_id} does not exist.")
-        if self._balances[transaction.account_id] < transaction.amount:
+    def _validate_batch(
+        self,
+        account_id: str,
+        balance: int | None,
+        transactions: Sequence[Tuple[TransactionType, int, str | None]],
+    ) -> None:
+        # Replays the batch against a running balance; None means no account yet.
+        for transaction_type, amount, _ in transactions:
+            if transaction_type is TransactionType.WITHDRAWAL:
+                if balance is None:
+                    raise ValueError(f"Account {account_id} does not exist.")
+                self._validate_withdrawal_is_possible(account_id, balance, amount)
+            else:
+                self._validate_deposit_is_possible(account_id, balance or 0, amount)
+            balance = (balance or 0) + _SIGN[transaction_type] * amount
+
+    def _validate_withdrawal_is_possible(
+        self, account_id: str, balance: int, amount: int
+    ) -> None:
+        if balance < amount:
             raise InsufficientFundsError(
-                f"""Insufficient funds for withdrawal: 
-                    Account ID: {transaction.account_id}, 
-                    Withdrawal Amount: {transaction.amount}
+                f"""Insufficient funds for withdrawal:
+                    Account ID: {account_id},
+                    Withdrawal Amount: {amount}
                 """
             )
+
+    def _validate_deposit_is_possible(
+        self, account_id: str, balance: int, amount: int
+    ) -> None:
+        if balance > MAX_AMOUNT - amount:
+            raise BalanceLimitExceededError(
+                f"Deposit of {amount} would take the balance of account {account_id} "
+                f"above the maximum of {MAX_AMOUNT}."
+            )
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from array import array
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from .schemas import StoredTransaction, TransactionType
+
+# Transaction types are stored as their index in this tuple.
+_TRANSACTION_TYPES: Tuple[TransactionType, ...] = tuple(TransactionType)
+_TYPE_CODES: Dict[TransactionType, int] = {
+    transaction_type: code for code, transaction_type in enumerate(_TRANSACTION_TYPES)
+}
+
+
+class TransactionLog:
+    """Append-only transaction history of one account, stored column by column.
+
+    Each field lives in its own typed array instead of one object per transaction, so
+    a transaction costs a few bytes plus its description, and the arrays grow by
+    over-allocation rather than per-row objects. Ids are not stored: the n-th
+    transaction of an account has id f"{id_prefix}{n}". Rows are only built as
+    StoredTransaction objects when the history is read.
+    """
+
+    def __init__(self) -> None:
+        self.type_codes = array("b")
+        self.amounts = array("q")
+        self.timestamps = array("d")  # POSIX timestamps
+        self.descriptions: List[str | None] = []
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def append(
+        self,
+        transaction_type: TransactionType,
+        amount: int,
+        timestamp: float,
+        description: str | None,
+    ) -> None:
+        # Everything that can raise (unknown type, amount outside int64) happens
+        # before the first column grows, so the columns never end up uneven.
+        type_code = _TYPE_CODES[transaction_type]
+        self.amounts.append(amount)
+        self.type_codes.append(type_code)
+        self.timestamps.append(timestamp)
+        self.descriptions.append(description)
+
+    def records(
+        self, start: int = 0
+    ) -> List[Tuple[TransactionType, int, float, str | None]]:
+        """Return each transaction from position start on as its append arguments."""
+        return [
+            (_TRANSACTION_TYPES[code], amount, timestamp, description)
+            for code, amount, timestamp, description in zip(
+                self.type_codes[start:],
+                self.amounts[start:],
+                self.timestamps[start:],
+                self.descriptions[start:],
+            )
+        ]
+
+    def copy(self) -> TransactionLog:
+        log = TransactionLog()
+        log.type_codes = self.type_codes[:]
+        log.amounts = self.amounts[:]
+        log.timestamps = self.timestamps[:]
+        log.descriptions = self.descriptions[:]
+        return log
+
+    def rows(self, account_id: str, id_prefix: str) -> List[StoredTransaction]:
+        return [
+            StoredTransaction(
+                id=id_prefix + str(position + 1),
+                account_id=account_id,
+                type=_TRANSACTION_TYPES[self.type_codes[position]],
+                amount=self.amounts[position],
+                description=self.descriptions[position],
+                timestamp=datetime.fromtimestamp(self.timestamps[position]),
+            )
+            for position in range(len(self.amounts))
+        ]
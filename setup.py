@@ -0,0 +1,18 @@
+"""Optional build step compiling the ledger service hot path with mypyc.
+
+    python setup.py build_ext --inplace
+
+puts compiled extension modules next to the ledger service modules, which Python
+then imports in preference to the .py files. Deleting the built .so files falls
+back to the pure-Python modules.
+"""
+
+from setuptools import setup
+from mypyc.build import mypycify
+
+setup(
+    name="tiny-ledger",
+    ext_modules=mypycify(
+        ["app/tinyLedger.py", "app/accountStore.py", "app/transactionLog.py"]
+    ),
+)
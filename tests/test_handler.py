@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.handler import MAX_BATCH_SIZE, app, handler
+from app.tinyLedger import LedgerService
+
+
+@pytest.fixture
+def client(monkeypatch) -> TestClient:
+    """Create a TestClient backed by a fresh LedgerService for each test."""
+    monkeypatch.setattr(handler, "ledgerService", LedgerService())
+    return TestClient(app)
+
+
+class TestLedgerHandler:
+    """Test suite for the HTTP API."""
+
+    def test_create_transaction_with_json_body(self, client: TestClient) -> None:
+        response = client.post(
+            "/transactions/acc1",
+            json={"amount": 10050, "type": "deposit", "description": "Test deposit"},
+        )
+
+        assert response.status_code == 201
+        assert response.json() == {"message": "Transaction successfully recorded."}
+        assert client.get("/balance/acc1").json() == {"balance": 10050}
+        [transaction] = client.get("/transactions/acc1").json()
+        assert transaction["amount"] == 10050
+        assert transaction["type"] == "deposit"
+        assert transaction["description"] == "Test deposit"
+
+    def test_create_transaction_with_invalid_json_returns_422(
+        self, client: TestClient
+    ) -> None:
+        response = client.post(
+            "/transactions/acc1",
+            content=b'{"amount": 100,',
+            headers={"Content-Type": "application/json"},
+        )
+
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"][0] == "body"
+
+    def test_create_transaction_with_invalid_field_returns_422(
+        self, client: TestClient
+    ) -> None:
+        response = client.post(
+            "/transactions/acc1", json={"amount": 100, "type": "transfer"}
+        )
+
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "type"]
+
+    @pytest.mark.parametrize("amount", [100.0, "100", True])
+    def test_create_transaction_with_non_integer_amount_returns_422(
+        self, client: TestClient, amount: object
+    ) -> None:
+        response = client.post(
+            "/transactions/acc1", json={"amount": amount, "type": "deposit"}
+        )
+
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "amount"]
+        assert client.get("/balance/acc1").status_code == 404
+
+    def test_create_transaction_with_text_plain_body_returns_422(
+        self, client: TestClient
+    ) -> None:
+        response = client.post(
+            "/transactions/acc1",
+            content=b'{"amount": 100, "type": "deposit"}',
+            headers={"Content-Type": "text/plain"},
+        )
+
+        assert response.status_code == 422
+        assert client.get("/balance/acc1").status_code == 404
+
+    def test_create_transaction_without_content_type_parses_json(
+        self, client: TestClient
+    ) -> None:
+        response = client.post(
+            "/transactions/acc1", content=b'{"amount": 100, "type": "deposit"}'
+        )
+
+        assert response.status_code == 201
+        assert client.get("/balance/acc1").json() == {"balance": 100}
+
+    def test_create_transaction_with_json_suffix_content_type(
+        self, client: TestClient
+    ) -> None:
+        response = client.post(
+            "/transactions/acc1",
+            content=b'{"amount": 100, "type": "deposit"}',
+            headers={"Content-Type": "application/vnd.ledger+json; charset=utf-8"},
+        )
+
+        assert response.status_code == 201
+
+    def test_create_transactions_batch(self, client: TestClient) -> None:
+        response = client.post(
+            "/transactions/acc1/batch",
+            json=[
+                {"amount": 10000, "type": "deposit"},
+                {"amount": 2500, "type": "withdrawal", "description": "Test"},
+            ],
+        )
+
+        assert response.status_code == 201
+        assert response.json() == {"message": "2 transactions successfully recorded."}
+        assert client.get("/balance/acc1").json() == {"balance": 7500}
+        assert len(client.get("/transactions/acc1").json()) == 2
+
+    def test_create_transactions_batch_of_one(self, client: TestClient) -> None:
+        response = client.post(
+            "/transactions/acc1/batch", json=[{"amount": 100, "type": "deposit"}]
+        )
+
+        assert response.status_code == 201
+        assert response.json() == {"message": "1 transaction successfully recorded."}
+
+    @pytest.mark.parametrize("size", [0, MAX_BATCH_SIZE + 1])
+    def test_create_transactions_batch_outside_size_limits_returns_422(
+        self, client: TestClient, size: int
+    ) -> None:
+        response = client.post(
+            "/transactions/acc1/batch",
+            json=[{"amount": 100, "type": "deposit"}] * size,
+        )
+
+        assert response.status_code == 422
+        assert client.get("/balance/acc1").status_code == 404
+
+    def test_create_transactions_batch_is_rejected_as_a_whole(
+        self, client: TestClient
+    ) -> None:
+        response = client.post(
+            "/transactions/acc1/batch",
+            json=[
+                {"amount": 100, "type": "deposit"},
+                {"amount": 500, "type": "withdrawal"},
+            ],
+        )
+
+        assert response.status_code == 400
+        assert client.get("/balance/acc1").status_code == 404
+
+    def test_create_transactions_batch_with_text_plain_body_returns_422(
+        self, client: TestClient
+    ) -> None:
+        response = client.post(
+            "/transactions/acc1/batch",
+            content=b'[{"amount": 100, "type": "deposit"}]',
+            headers={"Content-Type": "text/plain"},
+        )
+
+        assert response.status_code == 422
+
+    def test_openapi_documents_request_bodies(self, client: TestClient) -> None:
+        schema = client.get("/openapi.json").json()
+
+        components = schema["components"]["schemas"]
+        assert "TransactionRequest" in components
+        assert "TransactionType" in components
+        single = schema["paths"]["/transactions/{account_id}"]["post"]
+        batch = schema["paths"]["/transactions/{account_id}/batch"]["post"]
+        assert single["requestBody"]["content"]["application/json"]["schema"] == {
+            "$ref": "#/components/schemas/TransactionRequest"
+        }
+        assert batch["requestBody"]["content"]["application/json"]["schema"][
+            "items"
+        ] == {"$ref": "#/components/schemas/TransactionRequest"}
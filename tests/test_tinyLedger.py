@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from time import time
 from typing import List
 
 import pytest
 
-from app.schemas import Transaction, TransactionType
-from app.tinyLedger import LedgerService, InsufficientFundsError
+from app.schemas import MAX_AMOUNT, StoredTransaction, TransactionType
+from app.tinyLedger import (
+    BalanceLimitExceededError,
+    LedgerService,
+    InsufficientFundsError,
+)
 
 
 @pytest.fixture
@@ -22,8 +28,8 @@ class TestLedgerService:
     def test_process_transactions_saves_data(
         self, ledger_service: LedgerService
     ) -> None:
-        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 100.0)
-        ledger_service.process_transaction("acc2", TransactionType.DEPOSIT, 100.0)
+        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 10000)
+        ledger_service.process_transaction("acc2", TransactionType.DEPOSIT, 10000)
 
         assert ledger_service.list_transactions("acc1") is not None
         assert ledger_service.list_transactions("acc2") is not None
@@ -33,71 +39,71 @@ class TestLedgerService:
         self, ledger_service: LedgerService
     ) -> None:
         ledger_service.process_transaction(
-            "acc1", TransactionType.DEPOSIT, 150.0, "Test deposit 1"
+            "acc1", TransactionType.DEPOSIT, 15000, "Test deposit 1"
         )
         ledger_service.process_transaction(
-            "acc1", TransactionType.WITHDRAWAL, 100.0, "Test deposit 2"
+            "acc1", TransactionType.WITHDRAWAL, 10000, "Test deposit 2"
         )
         ledger_service.process_transaction(
-            "acc1", TransactionType.DEPOSIT, 100.0, "Test deposit 3"
+            "acc1", TransactionType.DEPOSIT, 10000, "Test deposit 3"
         )
         ledger_service.process_transaction(
-            "acc2", TransactionType.DEPOSIT, 100.0, "Test deposit 3"
-        ) # should not be in acc1's ledger as it is a different account
+            "acc2", TransactionType.DEPOSIT, 10000, "Test deposit 3"
+        )  # should not be in acc1's ledger as it is a different account
 
-        transactions: List[Transaction] = ledger_service.list_transactions("acc1")
-        transaction1: Transaction = transactions[0]
-        transaction2: Transaction = transactions[1]
+        transactions: List[StoredTransaction] = ledger_service.list_transactions("acc1")
+        transaction1: StoredTransaction = transactions[0]
+        transaction2: StoredTransaction = transactions[1]
 
         assert len(transactions) == 3
-        assert transaction1.amount == 150.0
+        assert transaction1.amount == 15000
         assert transaction1.description == "Test deposit 1"
         assert transaction1.type == TransactionType.DEPOSIT
         assert transaction1.id == f"{hash('acc1')}_1"
         assert transaction1.account_id == "acc1"
         # id
         assert transaction2.id == f"{hash('acc1')}_2"
-        assert transaction2.amount == 100.0
+        assert transaction2.amount == 10000
 
     def test_multiple_deposits_balance_calculated_correctly(
         self, ledger_service: LedgerService
     ) -> None:
-        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 100.0)
-        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 50.0)
-        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 25.5)
+        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 10000)
+        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 5000)
+        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 2550)
 
-        assert ledger_service.get_balance("acc1") == 175.5
+        assert ledger_service.get_balance("acc1") == 17550
 
     def test_deposit_and_withdraw_balance_calculated_correctly(
         self, ledger_service: LedgerService
     ) -> None:
-        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 200.0)
-        ledger_service.process_transaction("acc1", TransactionType.WITHDRAWAL, 75.0)
-        ledger_service.process_transaction("acc1", TransactionType.WITHDRAWAL, 25.0)
+        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 20000)
+        ledger_service.process_transaction("acc1", TransactionType.WITHDRAWAL, 7500)
+        ledger_service.process_transaction("acc1", TransactionType.WITHDRAWAL, 2500)
 
-        assert ledger_service.get_balance("acc1") == 100.0
+        assert ledger_service.get_balance("acc1") == 10000
 
     def test_withdrawal_with_insufficient_funds_raises_error(
         self, ledger_service: LedgerService
     ) -> None:
-        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 50.0)
+        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 5000)
 
         with pytest.raises(InsufficientFundsError, match="Insufficient funds"):
             ledger_service.process_transaction(
-                "acc1", TransactionType.WITHDRAWAL, 100.0
+                "acc1", TransactionType.WITHDRAWAL, 10000
             )
 
     def test_withdrawal_from_nonexistent_account_raises_error(
         self, ledger_service: LedgerService
     ) -> None:
         with pytest.raises(ValueError, match="Account acc1 does not exist"):
-            ledger_service.process_transaction("acc1", TransactionType.WITHDRAWAL, 50.0)
+            ledger_service.process_transaction("acc1", TransactionType.WITHDRAWAL, 5000)
 
     def test_transaction_with_nonpositive_amount_raises_error(
         self, ledger_service: LedgerService
     ) -> None:
         with pytest.raises(ValueError, match="Transaction amount must be positive"):
-            ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, -20.0)
+            ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, -2000)
 
     def test_get_balance_for_nonexistent_account_raises_error(
         self, ledger_service: LedgerService
@@ -110,3 +116,228 @@ class TestLedgerService:
     ) -> None:
         with pytest.raises(ValueError, match="Account acc1 does not exist"):
             ledger_service.list_transactions("acc1")
+
+    def test_concurrent_transactions_keep_balance_and_ids_consistent(
+        self, ledger_service: LedgerService
+    ) -> None:
+        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 5000)
+
+        def withdraw() -> None:
+            try:
+                ledger_service.process_transaction(
+                    "acc1", TransactionType.WITHDRAWAL, 100
+                )
+            except InsufficientFundsError:
+                pass
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for _ in range(100):
+                executor.submit(withdraw)
+
+        transactions = ledger_service.list_transactions("acc1")
+        assert ledger_service.get_balance("acc1") == 0
+        assert len(transactions) == 51
+        assert len({transaction.id for transaction in transactions}) == 51
+
+    def test_accounts_spilled_to_cold_store_keep_balance_and_history(self) -> None:
+        ledger_service = LedgerService(max_hot_accounts=1)
+        ledger_service.process_transaction(
+            "acc1", TransactionType.DEPOSIT, 10000, "Test deposit 1"
+        )
+        ledger_service.process_transaction("acc2", TransactionType.DEPOSIT, 5000)
+        # acc1 was evicted by acc2 and is loaded back from the cold store
+        ledger_service.process_transaction("acc1", TransactionType.WITHDRAWAL, 2500)
+
+        transactions = ledger_service.list_transactions("acc1")
+        assert ledger_service.get_balance("acc1") == 7500
+        assert [transaction.id for transaction in transactions] == [
+            f"{hash('acc1')}_1",
+            f"{hash('acc1')}_2",
+        ]
+        assert transactions[0].description == "Test deposit 1"
+        assert transactions[1].type == TransactionType.WITHDRAWAL
+        assert ledger_service.get_balance("acc2") == 5000
+
+    def test_account_moving_between_tiers_keeps_balance_and_history(self) -> None:
+        ledger_service = LedgerService(max_hot_accounts=1)
+        for deposit_number in range(3):
+            ledger_service.process_transaction(
+                "acc1", TransactionType.DEPOSIT, 1000, f"Deposit {deposit_number}"
+            )
+            # Spills acc1; the next deposit loads it back
+            ledger_service.process_transaction("acc2", TransactionType.DEPOSIT, 100)
+
+        transactions = ledger_service.list_transactions("acc1")
+        assert ledger_service.get_balance("acc1") == 3000
+        assert [transaction.description for transaction in transactions] == [
+            "Deposit 0",
+            "Deposit 1",
+            "Deposit 2",
+        ]
+        assert transactions[2].id == f"{hash('acc1')}_3"
+        assert ledger_service.get_balance("acc2") == 300
+
+    def test_reused_cold_store_path_starts_empty(self, tmp_path) -> None:
+        cold_store_path = str(tmp_path / "cold.sqlite3")
+        previous_service = LedgerService(
+            max_hot_accounts=1, cold_store_path=cold_store_path
+        )
+        previous_service.process_transaction("acc1", TransactionType.DEPOSIT, 10000)
+        # Spills acc1 to the cold store; acc2 stays hot and is never written there
+        previous_service.process_transaction("acc2", TransactionType.DEPOSIT, 5000)
+
+        ledger_service = LedgerService(
+            max_hot_accounts=1, cold_store_path=cold_store_path
+        )
+
+        with pytest.raises(ValueError):
+            ledger_service.get_balance("acc1")
+
+    def test_failed_spill_to_cold_store_keeps_account_hot(self, tmp_path) -> None:
+        cold_store_path = str(tmp_path / "cold.sqlite3")
+        ledger_service = LedgerService(
+            max_hot_accounts=1, cold_store_path=cold_store_path
+        )
+        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 10000)
+        # Make every write to the cold store fail, as a full disk would
+        cold_store = sqlite3.connect(cold_store_path)
+        with cold_store:
+            cold_store.execute(
+                "CREATE TRIGGER fail_spill BEFORE INSERT ON accounts "
+                "BEGIN SELECT RAISE(ABORT, 'disk full'); END"
+            )
+
+        with pytest.raises(sqlite3.IntegrityError, match="disk full"):
+            ledger_service.process_transaction("acc2", TransactionType.DEPOSIT, 5000)
+
+        assert ledger_service.get_balance("acc1") == 10000
+        with pytest.raises(ValueError, match="Account acc2 does not exist"):
+            ledger_service.get_balance("acc2")
+
+        with cold_store:
+            cold_store.execute("DROP TRIGGER fail_spill")
+        cold_store.close()
+        ledger_service.process_transaction("acc2", TransactionType.DEPOSIT, 5000)
+        assert ledger_service.get_balance("acc1") == 10000
+        assert ledger_service.get_balance("acc2") == 5000
+
+    def test_concurrent_transactions_with_cold_store_lose_no_updates(self) -> None:
+        ledger_service = LedgerService(max_hot_accounts=2)
+        account_ids = ["acc1", "acc2", "acc3", "acc4"]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for _ in range(50):
+                for account_id in account_ids:
+                    executor.submit(
+                        ledger_service.process_transaction,
+                        account_id,
+                        TransactionType.DEPOSIT,
+                        100,
+                    )
+
+        for account_id in account_ids:
+            transactions = ledger_service.list_transactions(account_id)
+            assert ledger_service.get_balance(account_id) == 5000
+            assert len({transaction.id for transaction in transactions}) == 50
+
+    def test_process_transactions_records_batch_in_order(
+        self, ledger_service: LedgerService
+    ) -> None:
+        ledger_service.process_transactions(
+            "acc1",
+            [
+                (TransactionType.DEPOSIT, 10000, "Test deposit 1"),
+                (TransactionType.WITHDRAWAL, 2500, None),
+                (TransactionType.DEPOSIT, 500, None),
+            ],
+        )
+
+        transactions = ledger_service.list_transactions("acc1")
+        assert ledger_service.get_balance("acc1") == 8000
+        assert [transaction.id for transaction in transactions] == [
+            f"{hash('acc1')}_1",
+            f"{hash('acc1')}_2",
+            f"{hash('acc1')}_3",
+        ]
+        assert transactions[0].description == "Test deposit 1"
+
+    def test_process_transactions_rejected_batch_records_nothing(
+        self, ledger_service: LedgerService
+    ) -> None:
+        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 5000)
+
+        with pytest.raises(InsufficientFundsError, match="Insufficient funds"):
+            ledger_service.process_transactions(
+                "acc1",
+                [
+                    (TransactionType.WITHDRAWAL, 4000, None),
+                    (TransactionType.WITHDRAWAL, 2000, None),
+                ],
+            )
+
+        assert ledger_service.get_balance("acc1") == 5000
+        assert len(ledger_service.list_transactions("acc1")) == 1
+
+    def test_process_transactions_withdrawal_before_account_exists_raises_error(
+        self, ledger_service: LedgerService
+    ) -> None:
+        with pytest.raises(ValueError, match="Account acc1 does not exist"):
+            ledger_service.process_transactions(
+                "acc1", [(TransactionType.WITHDRAWAL, 5000, None)]
+            )
+        with pytest.raises(ValueError, match="Account acc1 does not exist"):
+            ledger_service.get_balance("acc1")
+
+    def test_transaction_type_passed_as_string_is_validated(
+        self, ledger_service: LedgerService
+    ) -> None:
+        ledger_service.process_transaction("acc1", "deposit", 100)
+
+        with pytest.raises(InsufficientFundsError, match="Insufficient funds"):
+            ledger_service.process_transaction("acc1", "withdrawal", 1000)
+        with pytest.raises(InsufficientFundsError, match="Insufficient funds"):
+            ledger_service.process_transactions("acc1", [("withdrawal", 1000, None)])
+
+        assert ledger_service.get_balance("acc1") == 100
+        transaction = ledger_service.list_transactions("acc1")[0]
+        assert transaction.type is TransactionType.DEPOSIT
+
+    def test_deposit_above_maximum_balance_raises_error(
+        self, ledger_service: LedgerService
+    ) -> None:
+        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, MAX_AMOUNT)
+
+        with pytest.raises(BalanceLimitExceededError, match="above the maximum"):
+            ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 1)
+        with pytest.raises(BalanceLimitExceededError, match="above the maximum"):
+            ledger_service.process_transactions(
+                "acc2",
+                [
+                    (TransactionType.DEPOSIT, MAX_AMOUNT, None),
+                    (TransactionType.DEPOSIT, 1, None),
+                ],
+            )
+
+        assert ledger_service.get_balance("acc1") == MAX_AMOUNT
+        assert len(ledger_service.list_transactions("acc1")) == 1
+
+    def test_transaction_amount_above_maximum_leaves_account_unchanged(
+        self, ledger_service: LedgerService
+    ) -> None:
+        ledger_service.process_transaction("acc1", TransactionType.DEPOSIT, 100)
+
+        with pytest.raises(ValueError, match="must not exceed"):
+            ledger_service.process_transaction(
+                "acc1", TransactionType.DEPOSIT, MAX_AMOUNT + 1
+            )
+        with pytest.raises(ValueError, match="must not exceed"):
+            ledger_service.process_transactions(
+                "acc1",
+                [
+                    (TransactionType.DEPOSIT, 1, None),
+                    (TransactionType.DEPOSIT, 2**64, None),
+                ],
+            )
+
+        assert ledger_service.get_balance("acc1") == 100
+        assert len(ledger_service.list_transactions("acc1")) == 1